@@ -0,0 +1,128 @@
+"""
+batching.py - Micro-batching of concurrent prediction requests
+
+Requests that arrive within a short window are collected and passed to a
+vectorized predict function in a single call, so a real model can score
+them together instead of once per request.
+"""
+
+import asyncio
+
+
+class MicroBatcher:
+    """
+    Queue single-item predictions and run them through a batch function.
+    """
+
+    def __init__(self, predict_batch, max_batch_size=16, max_latency_ms=5, timeout=30):
+        """
+        Initialize the batcher.
+
+        Args:
+            predict_batch (callable): Function mapping a list of items to a list
+                of results in the same order
+            max_batch_size (int): Maximum number of items per batch call
+            max_latency_ms (float): How long to wait for a batch to fill up
+            timeout (float): Seconds a submitted item waits for its result
+                before giving up
+        """
+        self.predict_batch = predict_batch
+        self.max_batch_size = max_batch_size
+        self.max_latency = max_latency_ms / 1000
+        self.timeout = timeout
+        self._pending = []
+        self._ready = asyncio.Event()
+        self._full = asyncio.Event()
+        self._task = None
+
+    def start(self):
+        """
+        Start the background task that drains the queue.
+        """
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        """
+        Stop the background task and fail any items still waiting.
+        """
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+        pending, self._pending = self._pending, []
+        self._ready.clear()
+        self._full.clear()
+        _fail(pending, RuntimeError("Batcher stopped before the item was scored"))
+
+    async def submit(self, item):
+        """
+        Queue an item and wait for its result.
+
+        Args:
+            item: Single input for the batch function
+
+        Returns:
+            The batch function's result for this item
+
+        Raises:
+            asyncio.TimeoutError: If no result arrives within the timeout
+        """
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((item, future))
+        self._ready.set()
+        if len(self._pending) >= self.max_batch_size:
+            self._full.set()
+        return await asyncio.wait_for(future, self.timeout)
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            await self._ready.wait()
+
+            # Give concurrent requests a short window to join the batch
+            if len(self._pending) < self.max_batch_size:
+                try:
+                    await asyncio.wait_for(self._full.wait(), self.max_latency)
+                except asyncio.TimeoutError:
+                    pass
+
+            batch = self._pending[:self.max_batch_size]
+            del self._pending[:self.max_batch_size]
+            if len(self._pending) < self.max_batch_size:
+                self._full.clear()
+            if not self._pending:
+                self._ready.clear()
+
+            # Score the batch off the event loop, since a real model is CPU-bound
+            try:
+                results = await loop.run_in_executor(
+                    None, self.predict_batch, [item for item, _ in batch]
+                )
+            except asyncio.CancelledError:
+                _fail(batch, RuntimeError("Batcher stopped before the item was scored"))
+                raise
+            except Exception as e:
+                _fail(batch, e)
+                continue
+
+            if len(results) != len(batch):
+                _fail(batch, RuntimeError(
+                    f"Batch function returned {len(results)} results for {len(batch)} items"
+                ))
+                continue
+
+            for (_, future), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+
+
+def _fail(batch, exc):
+    # Resolve every still-waiting future in the batch with the given error
+    for _, future in batch:
+        if not future.done():
+            future.set_exception(exc)
@@ -0,0 +1,311 @@
+"""
+explanation.py - Template-based explanation system for BiasShield
+
+Generates natural language explanations of loan decisions, bias findings and
+remediation strategies. The text is produced by the cached module-level
+functions, which only take hashable, fully typed arguments so the module can
+be compiled ahead of time with mypyc (`mypyc explanation.py`) without changes.
+"""
+
+import functools
+from operator import itemgetter
+from typing import TYPE_CHECKING, List, Tuple
+
+if TYPE_CHECKING:
+    from app import FairnessResponse, LoanApplication, PredictionResponse
+
+# (name, value) pairs frozen from a Dict[str, float], e.g. approval rates by group
+Items = Tuple[Tuple[str, float], ...]
+# (attribute, approval disparity) pairs
+Disparities = Tuple[Tuple[str, float], ...]
+# (attribute, approval disparity, approval rate items) entries
+FrozenFairness = Tuple[Tuple[str, float, Items], ...]
+
+# Protected attributes as (display name, FairnessResponse field) pairs
+PROTECTED_ATTRIBUTES = (
+    ("Gender", "gender"),
+    ("Race", "race"),
+    ("Age Group", "age_group"),
+    ("Disability Status", "disability_status")
+)
+
+# Explanation templates, filled in with str.format_map
+APPROVED_INTRO_TEMPLATE = """
+We are pleased to inform you that your loan application has been approved with an approval probability of {probability:.1f}%. Our BiasShield system has carefully evaluated your application, taking into account various factors that contribute to your creditworthiness.
+
+The key factors that positively influenced this decision include:
+"""
+
+APPROVED_FACTOR_TEMPLATE = "- {factor_name}: This factor had a {impact:.1f}% impact on your approval\n"
+
+APPROVED_OUTRO_TEMPLATE = """
+Your credit score of {credit_score} and income of ${income:,.2f} demonstrate financial stability, which are important indicators of your ability to repay the loan.
+
+Recommendations:
+1. Maintain your current credit score by making timely payments
+2. Consider setting up automatic payments to avoid any missed deadlines
+3. Review your loan terms carefully before proceeding
+
+Thank you for choosing our services. If you have any questions about your approval or the next steps, please don't hesitate to contact our customer service team.
+
+BiasShield Decision System
+"""
+
+DENIED_INTRO_TEMPLATE = """
+We regret to inform you that your loan application has not been approved at this time. Our BiasShield system has carefully evaluated your application and determined that it does not meet our current lending criteria. The decision was made with an approval probability of {probability:.1f}%.
+
+The key factors that influenced this decision include:
+"""
+
+DENIED_FACTOR_TEMPLATE = "- {factor_name}: This factor had a {impact:.1f}% impact on the decision\n"
+
+DENIED_OUTRO_TEMPLATE = """
+Recommendations to improve your future applications:
+1. Work on improving your credit score through timely bill payments
+2. Reduce existing debt before applying for new credit
+3. Consider applying for a smaller loan amount relative to your income
+4. Wait 3-6 months before reapplying to allow time for credit improvements
+
+We encourage you to review your credit report for any inaccuracies and address any issues that may be affecting your creditworthiness. If you believe this decision was made in error or would like more information, you can request a detailed explanation of the decision.
+
+BiasShield Decision System
+"""
+
+ATTRIBUTE_SECTION_TEMPLATE = (
+    "**{attribute}**:\n"
+    "- Approval rate disparity: {disparity:.1f}%\n"
+    "- Highest approval rate: {highest_group} ({highest_rate:.1f}%)\n"
+    "- Lowest approval rate: {lowest_group} ({lowest_rate:.1f}%)\n"
+)
+
+REGULATORY_CONCERN_LINE = "- **Regulatory concern**: This disparity exceeds the typical 5% threshold for regulatory scrutiny.\n"
+
+
+@functools.lru_cache(maxsize=1024)
+def _loan_explanation(
+    approved: bool,
+    approval_probability: float,
+    explanation_factors: Items,
+    credit_score: int,
+    income: float
+) -> str:
+    """
+    Cached implementation of ExplanationGenerator.generate_loan_explanation
+    """
+    probability = approval_probability * 100
+
+    # Sort factors by importance
+    sorted_factors = sorted(explanation_factors, key=itemgetter(1), reverse=True)
+    top_factors = sorted_factors[:3]
+
+    # Pick the templates matching the decision
+    if approved:
+        intro, factor_line, outro = APPROVED_INTRO_TEMPLATE, APPROVED_FACTOR_TEMPLATE, APPROVED_OUTRO_TEMPLATE
+    else:
+        intro, factor_line, outro = DENIED_INTRO_TEMPLATE, DENIED_FACTOR_TEMPLATE, DENIED_OUTRO_TEMPLATE
+
+    subs = {"probability": probability, "credit_score": credit_score, "income": income}
+    parts = [intro.format_map(subs)]
+    for factor, impact in top_factors:
+        parts.append(factor_line.format_map({
+            "factor_name": factor.replace('_', ' ').title(),
+            "impact": impact * 100
+        }))
+    parts.append(outro.format_map(subs))
+
+    return "".join(parts)
+
+
+def _freeze_fairness(fairness_data: "FairnessResponse") -> FrozenFairness:
+    """
+    Convert fairness data into a hashable tuple of
+    (attribute, approval disparity, approval rate items) entries
+    """
+    frozen: List[Tuple[str, float, Items]] = []
+    for name, field in PROTECTED_ATTRIBUTES:
+        metrics = getattr(fairness_data, field)
+        frozen.append((name, metrics.approval_disparity, tuple(metrics.approval_rates.items())))
+    return tuple(frozen)
+
+
+@functools.lru_cache(maxsize=1024)
+def _analyze_disparities(frozen_disparities: Disparities) -> Tuple[Disparities, Disparities, float]:
+    """
+    Convert (attribute, approval disparity) pairs to percentages and rank them
+
+    Returns:
+        tuple: (disparities, disparities sorted by magnitude, largest magnitude)
+    """
+    disparities = tuple((attribute, disparity * 100) for attribute, disparity in frozen_disparities)
+
+    # Sort by disparity magnitude
+    sorted_disparities = tuple(sorted(disparities, key=lambda x: abs(x[1]), reverse=True))
+    return disparities, sorted_disparities, abs(sorted_disparities[0][1])
+
+
+@functools.lru_cache(maxsize=1024)
+def _bias_explanation(frozen_fairness: FrozenFairness) -> str:
+    """
+    Cached implementation of ExplanationGenerator.generate_bias_explanation
+    """
+    # Determine which attributes show the most significant bias
+    _, sorted_disparities, max_disparity = _analyze_disparities(
+        tuple((attribute, disparity) for attribute, disparity, _ in frozen_fairness)
+    )
+    approval_rates = {attribute: rates for attribute, _, rates in frozen_fairness}
+
+    # Generate explanation
+    parts = ["## Bias Analysis Report\n\n"]
+    parts.append("### Summary of Findings\n\n")
+
+    # Overall assessment
+    if max_disparity > 10:
+        parts.append("**High Bias Alert**: Significant disparities detected in approval rates across protected attributes.\n\n")
+    elif max_disparity > 5:
+        parts.append("**Moderate Bias Alert**: Some disparities detected in approval rates across protected attributes.\n\n")
+    else:
+        parts.append("**Low Bias Alert**: Minimal disparities detected in approval rates across protected attributes.\n\n")
+
+    # Detailed analysis
+    parts.append("### Detailed Analysis\n\n")
+
+    for attribute, disparity in sorted_disparities:
+        rates = approval_rates[attribute]
+        highest = max(rates, key=itemgetter(1))
+        lowest = min(rates, key=itemgetter(1))
+        parts.append(ATTRIBUTE_SECTION_TEMPLATE.format_map({
+            "attribute": attribute,
+            "disparity": disparity,
+            "highest_group": highest[0],
+            "highest_rate": highest[1] * 100,
+            "lowest_group": lowest[0],
+            "lowest_rate": lowest[1] * 100
+        }))
+
+        if abs(disparity) > 5:
+            parts.append(REGULATORY_CONCERN_LINE)
+
+        parts.append("\n")
+
+    # Conclusion
+    parts.append("### Conclusion\n\n")
+    if max_disparity > 10:
+        parts.append("The model shows significant bias that requires immediate attention. Implementing bias mitigation techniques is strongly recommended before deploying this model in production.\n")
+    elif max_disparity > 5:
+        parts.append("The model shows moderate bias that should be addressed. Consider implementing bias mitigation techniques to improve fairness before full deployment.\n")
+    else:
+        parts.append("The model shows acceptable levels of bias, but continuous monitoring is recommended to ensure fairness is maintained over time.\n")
+
+    return "".join(parts)
+
+
+@functools.lru_cache(maxsize=1024)
+def _remediation_strategy(frozen_disparities: Disparities) -> str:
+    """
+    Cached implementation of ExplanationGenerator.generate_remediation_strategy
+    """
+    # Determine which attributes show the most significant bias
+    _, sorted_disparities, _ = _analyze_disparities(frozen_disparities)
+    most_biased = sorted_disparities[0][0]
+
+    # Generate remediation strategy
+    parts = ["## Bias Remediation Strategy\n\n"]
+
+    # Technical strategies section
+    parts.append("### Technical Strategies\n\n")
+
+    parts.append("1. **Fairness Constraints**:\n")
+    parts.append("   - Implement Demographic Parity constraints during model training\n")
+    parts.append("   - Apply Equalized Odds constraints to balance error rates across groups\n")
+    parts.append(f"   - Focus particularly on {most_biased} fairness, which shows the highest disparity\n\n")
+
+    parts.append("2. **Data Rebalancing**:\n")
+    parts.append("   - Apply instance weighting to compensate for underrepresented groups\n")
+    parts.append("   - Use reweighing techniques from the AIF360 toolkit\n")
+    parts.append("   - Consider synthetic data generation for minority groups\n\n")
+
+    parts.append("3. **Model Adjustments**:\n")
+    parts.append("   - Optimize classification thresholds separately for each demographic group\n")
+    parts.append("   - Implement adversarial debiasing techniques\n")
+    parts.append("   - Consider ensemble methods that combine multiple fair classifiers\n\n")
+
+    # Feature engineering section
+    parts.append("### Feature Engineering Approaches\n\n")
+
+    parts.append("1. **Feature Selection**:\n")
+    parts.append("   - Remove or reduce weight of features highly correlated with protected attributes\n")
+    parts.append("   - Identify and eliminate proxy variables that may encode bias\n\n")
+
+    parts.append("2. **Feature Transformation**:\n")
+    parts.append("   - Apply fairness-aware feature transformations\n")
+    parts.append("   - Develop composite features that are less correlated with protected attributes\n\n")
+
+    # Policy recommendations
+    parts.append("### Policy Recommendations\n\n")
+
+    parts.append("1. **Process Changes**:\n")
+    parts.append("   - Implement a second-level review for rejected applications from protected groups\n")
+    parts.append("   - Establish clear documentation requirements for all lending decisions\n\n")
+
+    parts.append("2. **Monitoring Framework**:\n")
+    parts.append("   - Set up continuous monitoring of approval rates across demographic groups\n")
+    parts.append("   - Establish disparity thresholds that trigger automatic reviews\n")
+    parts.append("   - Conduct regular fairness audits with detailed reporting\n\n")
+
+    # Implementation considerations
+    parts.append("### Implementation Considerations\n\n")
+
+    parts.append("1. **Performance Tradeoffs**:\n")
+    parts.append("   - Be aware that some fairness constraints may slightly reduce overall model accuracy\n")
+    parts.append("   - Establish acceptable thresholds for both fairness and performance\n\n")
+
+    parts.append("2. **Regulatory Compliance**:\n")
+    parts.append("   - Document all bias mitigation efforts for regulatory review\n")
+    parts.append("   - Ensure compliance with ECOA, FHA, and FCRA requirements\n")
+    parts.append("   - Prepare explanations for any remaining disparities\n\n")
+
+    parts.append("3. **Validation Approach**:\n")
+    parts.append("   - Test remediation strategies on historical data before implementation\n")
+    parts.append("   - Use A/B testing to validate improvements in fairness metrics\n")
+    parts.append("   - Establish a feedback loop for continuous improvement\n\n")
+
+    return "".join(parts)
+
+
+class ExplanationGenerator:
+    """
+    Self-contained explanation system using templates and rules
+    """
+
+    @staticmethod
+    def generate_loan_explanation(application: "LoanApplication", prediction: "PredictionResponse") -> str:
+        """
+        Generate a natural language explanation for a loan decision
+        """
+        # Extract key information as hashable values so repeated inputs are
+        # served from the cache
+        return _loan_explanation(
+            prediction.approved,
+            prediction.approval_probability,
+            tuple(prediction.explanation.items()),
+            application.credit_score,
+            application.income
+        )
+
+    @staticmethod
+    def generate_bias_explanation(fairness_data: "FairnessResponse") -> str:
+        """
+        Generate a natural language explanation of bias findings
+        """
+        return _bias_explanation(_freeze_fairness(fairness_data))
+
+    @staticmethod
+    def generate_remediation_strategy(fairness_data: "FairnessResponse") -> str:
+        """
+        Generate remediation strategies for addressing bias
+        """
+        # Only the approval disparities drive the strategy text
+        return _remediation_strategy(tuple(
+            (name, getattr(fairness_data, field).approval_disparity)
+            for name, field in PROTECTED_ATTRIBUTES
+        ))
@@ -0,0 +1,18 @@
+"""
+gunicorn_conf.py - Production server settings for the BiasShield API
+
+Run from the backend directory with:
+    gunicorn -c gunicorn_conf.py app:app
+"""
+
+import os
+
+bind = os.environ.get("BIND", "0.0.0.0:8000")
+
+# The explanation and report endpoints are CPU-bound, so run one async
+# worker per core; uvloop and httptools are used when installed
+workers = int(os.environ.get("WEB_CONCURRENCY", os.cpu_count() or 1))
+worker_class = "uvicorn.workers.UvicornWorker"
+
+keepalive = 5
+timeout = 60
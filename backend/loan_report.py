@@ -4,189 +4,409 @@ loan_report.py - Generate PDF reports for loan decisions
 This module provides functions to generate PDF reports for loan decisions.
 """
 
-from reportlab.lib.pagesizes import letter
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, Image
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib import colors
+from concurrent.futures import ProcessPoolExecutor
+import base64
 import io
-import datetime
 import os
+import threading
+import datetime
+import heapq
+from functools import lru_cache
 from pathlib import Path
+from types import SimpleNamespace
 import re
+from xml.sax.saxutils import escape
+
+# Markdown emphasis markers and blank-line paragraph breaks in explanation text.
+# Stripping is a C-level str.translate; Numba was considered for this path but
+# it can't compile str-heavy code or ReportLab objects and is slower here.
+_ASTERISK_STRIP = str.maketrans('', '', '*')
+_PARA_SPLIT_RE = re.compile(r'\n\s*\n')
+
+_LOGO_PATH = (Path(__file__).parent.parent / 'frontend' / 'public' / 'logo.png').resolve()
+_TEMPLATE_DIR = Path(__file__).parent / 'templates'
 
-def generate_loan_report(application_data, prediction_result, explanation_text):
+@lru_cache(maxsize=None)
+def _resources():
     """
-    Generate a PDF loan decision report.
+    Import ReportLab and build the classes, styles and logo shared by every
+    report.
+    
+    ReportLab is only loaded when the first report is generated, so importing
+    this module stays cheap for processes that never render a PDF.
     
-    Args:
-        application_data (dict): Loan application data
-        prediction_result (dict): Prediction result data
-        explanation_text (str): Explanation text generated by the explanation system
-        
     Returns:
-        bytes: PDF file as bytes
+        SimpleNamespace: ReportLab classes and page size, paragraph styles,
+            table styles and the decoded logo
     """
-    # Create a file-like buffer to receive PDF data
-    buffer = io.BytesIO()
-    
-    # Create the PDF object using the buffer as its "file"
-    doc = SimpleDocTemplate(buffer, pagesize=letter, title="BiasShield Loan Decision Report")
+    from reportlab.lib.pagesizes import letter
+    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+    from reportlab.lib import colors
+    from reportlab.lib.utils import ImageReader
+    from reportlab.platypus import (
+        SimpleDocTemplate, Paragraph, Spacer, LongTable, Image, TableStyle
+    )
     
-    # Create styles
     styles = getSampleStyleSheet()
-    title_style = styles['Title']
-    heading1_style = styles['Heading1']
-    heading2_style = styles['Heading2']
-    normal_style = styles['Normal']
     
-    # Create custom styles
+    # Bind the colors once for the style definitions below
+    gray, green, red = colors.gray, colors.green, colors.red
+    lightblue, whitesmoke = colors.lightblue, colors.whitesmoke
+    beige, black = colors.beige, colors.black
+    
     header_style = ParagraphStyle(
         'Header',
-        parent=normal_style,
+        parent=styles['Normal'],
         fontName='Helvetica-Bold',
         fontSize=8,
-        textColor=colors.gray
+        textColor=gray
     )
     
     bold_style = ParagraphStyle(
         'Bold',
-        parent=normal_style,
+        parent=styles['Normal'],
         fontName='Helvetica-Bold'
     )
     
-    # Create content
-    content = []
+    decision_approved_style = ParagraphStyle(
+        'Decision',
+        parent=styles['Heading1'],
+        textColor=green
+    )
     
-    # Try to add logo if it exists
-    logo_path = Path(__file__).parent.parent / 'frontend' / 'public' / 'logo.png'
-    if os.path.exists(logo_path):
-        logo = Image(logo_path, width=200, height=50)
-        content.append(logo)
-        content.append(Spacer(1, 12))
+    decision_denied_style = ParagraphStyle(
+        'Decision',
+        parent=styles['Heading1'],
+        textColor=red
+    )
     
-    # Add title and date
-    content.append(Paragraph("BiasShield Loan Decision Report", title_style))
-    content.append(Spacer(1, 12))
+    # Explanation paragraphs carry their own trailing space instead of a Spacer
+    explanation_style = ParagraphStyle(
+        'Explanation',
+        parent=styles['Normal'],
+        spaceAfter=12
+    )
+    
+    applicant_table_style = TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), lightblue),
+        ('TEXTCOLOR', (0, 0), (-1, 0), whitesmoke),
+        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+        ('BACKGROUND', (0, 1), (-1, -1), beige),
+        ('GRID', (0, 0), (-1, -1), 1, black)
+    ])
+    
+    # The factor table shares the applicant table's look, with impacts
+    # right-aligned
+    factor_table_style = TableStyle([
+        ('ALIGN', (1, 0), (1, -1), 'RIGHT')
+    ], parent=applicant_table_style)
+    
+    # Decode the logo once; reports draw from the shared reader
+    logo_reader = ImageReader(str(_LOGO_PATH)) if _LOGO_PATH.is_file() else None
+    
+    return SimpleNamespace(
+        letter=letter,
+        SimpleDocTemplate=SimpleDocTemplate,
+        Paragraph=Paragraph,
+        Spacer=Spacer,
+        LongTable=LongTable,
+        Image=Image,
+        title=styles['Title'],
+        heading2=styles['Heading2'],
+        normal=styles['Normal'],
+        header=header_style,
+        bold=bold_style,
+        decision_approved=decision_approved_style,
+        decision_denied=decision_denied_style,
+        explanation=explanation_style,
+        applicant_table=applicant_table_style,
+        factor_table=factor_table_style,
+        logo_reader=logo_reader,
+    )
+
+@lru_cache(maxsize=None)
+def _html_template():
+    """
+    Load and compile the HTML report template.
     
-    # Add date
-    today = datetime.datetime.now().strftime("%B %d, %Y")
-    content.append(Paragraph(f"Generated on: {today}", normal_style))
-    content.append(Spacer(1, 24))
+    Returns:
+        jinja2.Template: Compiled template, with the logo available to it as
+            a data URI
+    """
+    import jinja2
+    
+    env = jinja2.Environment(
+        loader=jinja2.FileSystemLoader(str(_TEMPLATE_DIR)),
+        autoescape=True,
+        auto_reload=False,
+        trim_blocks=True,
+        lstrip_blocks=True
+    )
+    if _LOGO_PATH.is_file():
+        encoded = base64.b64encode(_LOGO_PATH.read_bytes()).decode('ascii')
+        env.globals['logo_uri'] = f"data:image/png;base64,{encoded}"
+    return env.get_template('loan_report.html')
+
+# Maximum number of factor rows per decision factors table
+_FACTOR_TABLE_CHUNK = 20
+
+# Row heights of the single-line Helvetica 10 table cells: 12pt leading plus
+# 3pt top padding and 3pt bottom padding, or 12pt on the bold header row
+_HEADER_ROW_HEIGHT = 27
+_ROW_HEIGHT = 18
+
+def _row_heights(row_count):
+    # Fixed heights let ReportLab skip measuring every cell
+    return [_HEADER_ROW_HEIGHT] + [_ROW_HEIGHT] * (row_count - 1)
+
+# (date, formatted string) for the most recent report date
+_DATE_CACHE = (None, "")
+
+def _report_date():
+    # Format the date once per day rather than once per report
+    global _DATE_CACHE
+    today = datetime.date.today()
+    if _DATE_CACHE[0] != today:
+        _DATE_CACHE = (today, today.strftime("%B %d, %Y"))
+    return _DATE_CACHE[1]
+
+@lru_cache(maxsize=1024)
+def _factor_title(factor):
+    # Factor names repeat across reports, so their display form is memoized
+    return factor.replace('_', ' ').title()
+
+def _applicant_rows(application_data):
+    # Rows of the applicant information table, header first
+    get = application_data.get
+    gender = get('gender', 'N/A')
+    race = get('race', 'N/A')
+    age = get('age', 'N/A')
+    income = get('income', 0)
+    credit_score = get('credit_score', 'N/A')
+    loan_amount = get('loan_amount', 0)
+    employment_type = get('employment_type', 'N/A')
+    
+    return [
+        ['Field', 'Value'],
+        ['Name', 'Applicant'],  # In a real app, this would be the actual name
+        ['Gender', gender],
+        ['Race', race],
+        ['Age', str(age)],
+        ['Income', f"${income:,.2f}"],
+        ['Credit Score', str(credit_score)],
+        ['Loan Amount', f"${loan_amount:,.2f}"],
+        ['Employment Type', employment_type]
+    ]
+
+def _factor_rows(prediction_result, max_factors=None):
+    # [name, impact] rows of the decision factors table, most impactful first
+    explanation = prediction_result.get('explanation', {})
+    if max_factors is None:
+        factors = sorted(explanation.items(), key=lambda kv: -abs(kv[1]))
+    else:
+        # Partial selection is O(N log K) when only the top factors are shown
+        factors = heapq.nlargest(max_factors, explanation.items(), key=lambda kv: abs(kv[1]))
+    
+    return [[_factor_title(factor), f"{impact:.2f}"] for factor, impact in factors]
+
+def _explanation_paragraphs(explanation_text):
+    # Remove markdown formatting, split on blank lines and collapse each
+    # paragraph's line breaks and runs of whitespace
+    processed_text = explanation_text.translate(_ASTERISK_STRIP)
+    return [' '.join(p.split()) for p in _PARA_SPLIT_RE.split(processed_text) if p.strip()]
+
+def _iter_flowables(res, application_data, prediction_result, explanation_text, max_factors):
+    # Yield the report's flowables in document order
+    Paragraph, Spacer, LongTable, Image = res.Paragraph, res.Spacer, res.LongTable, res.Image
+    
+    # Add logo if it exists
+    if res.logo_reader is not None:
+        logo = Image(str(_LOGO_PATH), width=200, height=50)
+        # Draw from the shared reader instead of re-reading and decoding the PNG
+        logo._img = res.logo_reader
+        yield from (logo, Spacer(1, 12))
+    
+    # Add title and date
+    today = _report_date()
+    yield from (
+        Paragraph("BiasShield Loan Decision Report", res.title),
+        Spacer(1, 12),
+        Paragraph(f"Generated on: {today}", res.normal),
+        Spacer(1, 24),
+    )
     
     # Add decision summary
     approved = prediction_result.get('approved', False)
     approval_probability = prediction_result.get('approval_probability', 0) * 100
     
-    decision_color = colors.green if approved else colors.red
     decision_text = "APPROVED" if approved else "DENIED"
+    decision_style = res.decision_approved if approved else res.decision_denied
     
-    decision_style = ParagraphStyle(
-        'Decision',
-        parent=heading1_style,
-        textColor=decision_color
+    yield from (
+        Paragraph(f"Loan Application: {decision_text}", decision_style),
+        Paragraph(f"Approval Probability: {approval_probability:.1f}%", res.bold),
+        Spacer(1, 24),
     )
     
-    content.append(Paragraph(f"Loan Application: {decision_text}", decision_style))
-    content.append(Paragraph(f"Approval Probability: {approval_probability:.1f}%", bold_style))
-    content.append(Spacer(1, 24))
-    
     # Add applicant information
-    content.append(Paragraph("Applicant Information", heading2_style))
-    content.append(Spacer(1, 12))
+    applicant_data = _applicant_rows(application_data)
     
-    applicant_data = [
-        ['Field', 'Value'],
-        ['Name', 'Applicant'],  # In a real app, this would be the actual name
-        ['Gender', application_data.get('gender', 'N/A')],
-        ['Race', application_data.get('race', 'N/A')],
-        ['Age', str(application_data.get('age', 'N/A'))],
-        ['Income', f"${application_data.get('income', 0):,.2f}"],
-        ['Credit Score', str(application_data.get('credit_score', 'N/A'))],
-        ['Loan Amount', f"${application_data.get('loan_amount', 0):,.2f}"],
-        ['Employment Type', application_data.get('employment_type', 'N/A')]
-    ]
+    applicant_table = LongTable(applicant_data, colWidths=[150, 300],
+                                rowHeights=_row_heights(len(applicant_data)))
+    applicant_table.setStyle(res.applicant_table)
     
-    applicant_table = Table(applicant_data, colWidths=[150, 300])
-    applicant_table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, 0), colors.lightblue),
-        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-        ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-        ('GRID', (0, 0), (-1, -1), 1, colors.black)
-    ]))
-    
-    content.append(applicant_table)
-    content.append(Spacer(1, 24))
+    yield from (
+        Paragraph("Applicant Information", res.heading2),
+        Spacer(1, 12),
+        applicant_table,
+        Spacer(1, 24),
+    )
     
     # Add decision factors
-    content.append(Paragraph("Decision Factors", heading2_style))
-    content.append(Spacer(1, 12))
+    factor_rows = _factor_rows(prediction_result, max_factors)
     
-    explanation = prediction_result.get('explanation', {})
-    factors = sorted(explanation.items(), key=lambda x: abs(x[1]), reverse=True)
-    
-    factor_data = [['Factor', 'Impact']]
-    for factor, impact in factors:
-        # Format factor name
-        factor_name = factor.replace('_', ' ').title()
-        factor_data.append([factor_name, f"{impact:.2f}"])
-    
-    factor_table = Table(factor_data, colWidths=[300, 150])
-    factor_table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, 0), colors.lightblue),
-        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-        ('ALIGN', (1, 0), (1, -1), 'RIGHT'),
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-        ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-        ('GRID', (0, 0), (-1, -1), 1, colors.black)
-    ]))
+    yield from (Paragraph("Decision Factors", res.heading2), Spacer(1, 12))
+    
+    # Long factor lists are emitted as several short tables, since ReportLab
+    # re-lays out the remainder of a table every time it splits across pages
+    for start in range(0, max(len(factor_rows), 1), _FACTOR_TABLE_CHUNK):
+        if start:
+            yield Spacer(1, 6)
+        factor_data = [['Factor', 'Impact']]
+        factor_data.extend(factor_rows[start:start + _FACTOR_TABLE_CHUNK])
+        factor_table = LongTable(factor_data, colWidths=[300, 150],
+                                 rowHeights=_row_heights(len(factor_data)))
+        factor_table.setStyle(res.factor_table)
+        yield factor_table
     
-    content.append(factor_table)
-    content.append(Spacer(1, 24))
+    yield Spacer(1, 24)
     
     # Add explanation
-    content.append(Paragraph("Detailed Explanation", heading2_style))
-    content.append(Spacer(1, 12))
-    
-    # Process explanation text - remove markdown formatting
-    processed_text = explanation_text.replace('**', '')
-    processed_text = processed_text.replace('*', '')  # Remove single asterisks as well
-    
-    # Format the explanation text for better readability in PDF
-    paragraphs = []
-    current_paragraph = []
-    
-    for line in processed_text.split('\n'):
-        if line.strip():
-            current_paragraph.append(line)
-        else:
-            if current_paragraph:
-                paragraphs.append(' '.join(current_paragraph))
-                current_paragraph = []
-    
-    if current_paragraph:
-        paragraphs.append(' '.join(current_paragraph))
-    
-    # Add each paragraph to the PDF
-    for paragraph in paragraphs:
-        if paragraph.strip():
-            content.append(Paragraph(paragraph, normal_style))
-            content.append(Spacer(1, 12))
+    yield from (Paragraph("Detailed Explanation", res.heading2), Spacer(1, 12))
+    
+    # Add each paragraph to the PDF, escaped so stray "<" or "&" in the text
+    # can't break ReportLab's markup parser
+    for paragraph in _explanation_paragraphs(explanation_text):
+        yield Paragraph(escape(paragraph), res.explanation)
     
     # Add footer
-    content.append(Spacer(1, 24))
-    content.append(Paragraph("CONFIDENTIAL - FOR APPLICANT USE ONLY", header_style))
-    content.append(Paragraph("BiasShield Decision System", header_style))
+    yield from (
+        Spacer(1, 24),
+        Paragraph("CONFIDENTIAL - FOR APPLICANT USE ONLY", res.header),
+        Paragraph("BiasShield Decision System", res.header),
+    )
+
+def generate_loan_report(application_data, prediction_result, explanation_text, out=None,
+                         max_factors=None):
+    """
+    Generate a PDF loan decision report.
     
-    # Build the PDF
-    doc.build(content)
+    Args:
+        application_data (dict): Loan application data
+        prediction_result (dict): Prediction result data
+        explanation_text (str): Explanation text generated by the explanation system
+        out (file, optional): Binary stream to write the PDF into instead of
+            returning it
+        max_factors (int, optional): Only list this many of the most
+            impactful decision factors
+        
+    Returns:
+        bytes: PDF file as bytes, or None when written to out
+    """
+    res = _resources()
+    
+    # Write straight into the caller's stream if given, otherwise into a buffer
+    buffer = io.BytesIO() if out is None else out
+    
+    # Create the PDF object using the buffer as its "file"
+    doc = res.SimpleDocTemplate(buffer, pagesize=res.letter, title="BiasShield Loan Decision Report")
+    
+    # Build the PDF; ReportLab consumes the flowables by deleting from the
+    # front of a list, so the generator is materialized first
+    doc.build(list(_iter_flowables(
+        res, application_data, prediction_result, explanation_text, max_factors
+    )))
+    
+    if out is not None:
+        return None
     
     # Get the value of the BytesIO buffer
     pdf = buffer.getvalue()
     buffer.close()
     
     return pdf
+
+
+# Process pool for rendering many reports in parallel, created on first use
+_POOL = None
+_POOL_LOCK = threading.Lock()
+
+def _warm_up():
+    # Load ReportLab, the shared styles and the standard font metrics, and lay
+    # out a tiny document, so the first real report doesn't pay for them
+    from reportlab.pdfbase.pdfmetrics import stringWidth
+    
+    res = _resources()
+    for font_name in ('Helvetica', 'Helvetica-Bold'):
+        stringWidth('BiasShield', font_name, 10)
+    
+    doc = res.SimpleDocTemplate(io.BytesIO(), pagesize=res.letter)
+    doc.build([res.Paragraph("BiasShield", res.normal)])
+
+def _render_one(job):
+    return generate_loan_report(*job)
+
+def generate_loan_reports_bulk(jobs):
+    """
+    Generate several PDF loan decision reports in parallel worker processes.
+    
+    Args:
+        jobs (list): (application_data, prediction_result, explanation_text)
+            tuples, one per report
+        
+    Returns:
+        list: PDF files as bytes, in the same order as jobs
+    """
+    global _POOL
+    with _POOL_LOCK:
+        if _POOL is None:
+            _POOL = ProcessPoolExecutor(max_workers=os.cpu_count(), initializer=_warm_up)
+    
+    return list(_POOL.map(_render_one, jobs))
+
+
+def generate_loan_report_html(application_data, prediction_result, explanation_text,
+                              max_factors=None):
+    """
+    Generate an HTML preview of the loan decision report.
+    
+    Renders the same content as generate_loan_report through a compiled
+    template, without ReportLab's page layout, so reports can be shown inline
+    and only built as PDF when they are downloaded.
+    
+    Args:
+        application_data (dict): Loan application data
+        prediction_result (dict): Prediction result data
+        explanation_text (str): Explanation text generated by the explanation system
+        max_factors (int, optional): Only list this many of the most
+            impactful decision factors
+        
+    Returns:
+        str: HTML document
+    """
+    return _html_template().render(
+        today=_report_date(),
+        approved=prediction_result.get('approved', False),
+        approval_probability=prediction_result.get('approval_probability', 0) * 100,
+        applicant_rows=_applicant_rows(application_data),
+        factor_rows=_factor_rows(prediction_result, max_factors),
+        paragraphs=_explanation_paragraphs(explanation_text),
+    )
+
+
+# Optionally pay ReportLab's first-use cost at startup instead of on the first
+# report request
+if os.environ.get('BIASSHIELD_WARMUP') == '1':
+    _warm_up()
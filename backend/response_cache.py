@@ -0,0 +1,98 @@
+"""
+response_cache.py - Redis-backed cache for deterministic API responses
+
+The explanation endpoints are pure functions of their request bodies, so their
+serialized responses can be stored in Redis and replayed for identical inputs.
+Caching is enabled only when the redis package is installed and REDIS_URL is
+set; otherwise every request is computed as before.
+"""
+
+import os
+import hashlib
+import logging
+from pathlib import Path
+import orjson
+from fastapi.responses import Response
+
+try:
+    import redis.asyncio as aioredis
+    from redis.exceptions import RedisError
+except ImportError:
+    aioredis = None
+    RedisError = Exception
+
+logger = logging.getLogger(__name__)
+
+REDIS_URL = os.environ.get("REDIS_URL")
+CACHE_TTL = int(os.environ.get("RESPONSE_CACHE_TTL", "3600"))
+# Seconds to wait on Redis before falling back to computing the response
+CACHE_TIMEOUT = float(os.environ.get("RESPONSE_CACHE_TIMEOUT", "0.1"))
+
+def _explanation_version():
+    # Entries are keyed by the explanation source, so a deploy that changes the
+    # wording doesn't keep serving the old text until it expires
+    source = Path(__file__).with_name("explanation.py")
+    if not source.is_file():
+        return "0"
+    return hashlib.blake2b(source.read_bytes(), digest_size=4).hexdigest()
+
+CACHE_VERSION = os.environ.get("RESPONSE_CACHE_VERSION") or _explanation_version()
+
+_client = (
+    aioredis.from_url(
+        REDIS_URL,
+        socket_timeout=CACHE_TIMEOUT,
+        socket_connect_timeout=CACHE_TIMEOUT
+    )
+    if aioredis is not None and REDIS_URL else None
+)
+
+
+def cache_key(prefix, *models):
+    """
+    Build a cache key from the JSON form of one or more pydantic models.
+
+    Args:
+        prefix (str): Namespace for the endpoint the key belongs to
+        *models: Request models the response depends on
+
+    Returns:
+        str: Key of the form "<prefix>:<version>:<blake2b hex digest>"
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    for model in models:
+        digest.update(model.model_dump_json().encode())
+    return f"{prefix}:{CACHE_VERSION}:{digest.hexdigest()}"
+
+
+async def cached_json_response(prefix, models, build):
+    """
+    Return the cached JSON response for the given request models, building and
+    storing it on a miss.
+
+    Args:
+        prefix (str): Namespace for the endpoint the key belongs to
+        models (tuple): Request models the response depends on
+        build (callable): Zero-argument function returning the response content
+
+    Returns:
+        Response: JSON response with the cached or freshly built body
+    """
+    if _client is None:
+        return Response(orjson.dumps(build()), media_type="application/json")
+
+    key = cache_key(prefix, *models)
+    try:
+        body = await _client.get(key)
+    except RedisError as e:
+        logger.warning(f"Response cache read failed: {e}")
+        body = None
+
+    if body is None:
+        body = orjson.dumps(build())
+        try:
+            await _client.set(key, body, ex=CACHE_TTL)
+        except RedisError as e:
+            logger.warning(f"Response cache write failed: {e}")
+
+    return Response(body, media_type="application/json")